@@ -3,18 +3,18 @@ Azure Functions App Entry Point
 ================================
 This module serves as the main entry point for Azure Functions.
 The actual business logic is organized in the running-webhook and hevy-webhook packages.
+Handler packages are imported on first use so a cold start only loads the
+dependencies of the route that is actually invoked.
 """
 
 import azure.functions as func
-from running_webhook import workout_webhook as running_webhook_handler
-from hevy_webhook import hevy_workout_webhook as hevy_webhook_handler
 
 # Initialize Azure Functions app
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 
 @app.route(route="workout_webhook", methods=["POST"])
-def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
+async def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
     """
     Webhook endpoint to receive running workout data from iOS Shortcuts.
     
@@ -28,21 +28,37 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
     Returns:
         JSON response with workout data and Notion page ID
     """
-    return running_webhook_handler(req)
+    from running_webhook import workout_webhook as running_webhook_handler
+    return await running_webhook_handler(req)
 
 
 @app.route(route="hevy_webhook", methods=["POST"])
-def hevy_webhook(req: func.HttpRequest) -> func.HttpResponse:
+@app.queue_output(arg_name="msg", queue_name="hevy-workouts", connection="AzureWebJobsStorage")
+async def hevy_webhook(req: func.HttpRequest, msg: func.Out[str]) -> func.HttpResponse:
     """
     Webhook endpoint to receive workout data from Hevy app.
     
     This is the main entry point that delegates to the hevy_webhook handler.
+    The workout is queued and processed by hevy_workout_processor.
     
     Accepts JSON payload with:
     - id: webhook event ID (string)
     - payload.workoutId: UUID of the workout (string)
     
     Returns:
-        JSON response with processing status
+        JSON response with 202 status once the workout is queued
     """
-    return hevy_webhook_handler(req)
\ No newline at end of file
+    from hevy_webhook import hevy_workout_webhook as hevy_webhook_handler
+    return await hevy_webhook_handler(req, msg)
+
+
+@app.queue_trigger(arg_name="msg", queue_name="hevy-workouts", connection="AzureWebJobsStorage")
+async def hevy_workout_processor(msg: func.QueueMessage) -> None:
+    """
+    Queue trigger that syncs a Hevy workout to Notion.
+    
+    Failed messages are retried by the Functions host and moved to the
+    hevy-workouts-poison queue after the maximum dequeue count.
+    """
+    from hevy_webhook import hevy_workout_queue_handler
+    await hevy_workout_queue_handler(msg)
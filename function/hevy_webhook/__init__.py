@@ -1,6 +1,5 @@
 """Hevy webhook module for processing workout data from Hevy app."""
 
-from .hevy_webhook import hevy_workout_webhook
-from . import hevy_api
+from .hevy_webhook import hevy_workout_webhook, hevy_workout_queue_handler, process_hevy_workout
 
-__all__ = ['hevy_workout_webhook', 'hevy_api']
+__all__ = ['hevy_workout_webhook', 'hevy_workout_queue_handler', 'process_hevy_workout']
@@ -1,129 +1,136 @@
 """Helper module for interacting with Hevy API."""
 
+from __future__ import annotations
+
 import logging
 import os
-import requests
+import sys
 import asyncio
-import aiohttp
-from typing import Optional, Dict, Any, List
+import httpx
+import requests
+import orjson
+from typing import Optional, Any
+from dataclasses import dataclass
 from datetime import datetime
+from cachetools import TTLCache
+
+_HEVY_BASE_URL = "https://api.hevyapp.com/v1"
+
+# App settings are fixed for the lifetime of the worker process, so the
+# request headers are built once at import
+_HEVY_API_KEY = os.environ.get("HEVY_API_KEY")
+_HEVY_HEADERS = {
+    "api-key": _HEVY_API_KEY,
+    "Content-Type": "application/json"
+} if _HEVY_API_KEY else None
 
+# Routines and exercise templates rarely change, so responses are cached per
+# worker process. Only successful responses are stored, errors are retried.
+_routine_cache: TTLCache = TTLCache(maxsize=256, ttl=3600)
+_template_cache: TTLCache = TTLCache(maxsize=2048, ttl=86400)
 
-def get_workout_details(workout_id: str) -> Optional[Dict[str, Any]]:
+# Pooled session for the synchronous helpers, keeps connections alive between calls
+_sync_session = requests.Session()
+if _HEVY_HEADERS:
+    _sync_session.headers.update(_HEVY_HEADERS)
+
+
+def _fetch_hevy_api_sync(url: str) -> Optional[dict[str, Any]]:
     """
-    Fetch workout details from Hevy API.
+    Fetch data from Hevy API synchronously.
     
     Args:
-        workout_id: UUID of the workout to fetch
+        url: Full URL to fetch
         
     Returns:
-        Dictionary containing workout details, or None if error
+        Dictionary containing API response, or None if error
     """
-    hevy_api_key = os.environ.get("HEVY_API_KEY")
-    
-    if not hevy_api_key:
+    if not _HEVY_HEADERS:
         logging.error("HEVY_API_KEY not configured")
         return None
     
-    headers = {
-        "api-key": hevy_api_key,
-        "Content-Type": "application/json"
-    }
-    
     try:
-        response = requests.get(
-            f"https://api.hevyapp.com/v1/workouts/{workout_id}",
-            headers=headers,
-            timeout=10
-        )
+        response = _sync_session.get(url, timeout=10)
         
         if response.status_code != 200:
-            logging.error(f"Hevy API error: {response.status_code} - {response.text}")
+            logging.error("Hevy API error for %s: %s - %s", url, response.status_code, response.text)
             return None
         
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch workout from Hevy API: {str(e)}")
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logging.error("Failed to fetch from Hevy API: %s - %s", url, e)
         return None
 
 
-def get_routine_details(routine_id: str) -> Optional[Dict[str, Any]]:
+def get_workout_details(workout_id: str) -> Optional[dict[str, Any]]:
+    """
+    Fetch workout details from Hevy API.
+    
+    Synchronous variant for legacy callers, uses the pooled requests session.
+    
+    Args:
+        workout_id: UUID of the workout to fetch
+        
+    Returns:
+        Dictionary containing workout details, or None if error
+    """
+    return _fetch_hevy_api_sync(f"{_HEVY_BASE_URL}/workouts/{workout_id}")
+
+
+def get_routine_details(routine_id: str) -> Optional[dict[str, Any]]:
     """
     Fetch routine details from Hevy API.
     
+    Synchronous variant for legacy callers, uses the pooled requests session.
+    
     Args:
         routine_id: UUID of the routine to fetch
         
     Returns:
         Dictionary containing routine details, or None if error
     """
-    hevy_api_key = os.environ.get("HEVY_API_KEY")
+    cached = _routine_cache.get(routine_id)
+    if cached is not None:
+        return cached
     
-    if not hevy_api_key:
-        logging.error("HEVY_API_KEY not configured")
-        return None
-    
-    headers = {
-        "api-key": hevy_api_key,
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        response = requests.get(
-            f"https://api.hevyapp.com/v1/routines/{routine_id}",
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            logging.error(f"Hevy API error for routine: {response.status_code} - {response.text}")
-            return None
-        
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch routine from Hevy API: {str(e)}")
-        return None
+    routine = _fetch_hevy_api_sync(f"{_HEVY_BASE_URL}/routines/{routine_id}")
+    if routine:
+        _routine_cache[routine_id] = routine
+    return routine
 
 
-def get_exercise_template(exercise_template_id: str) -> Optional[Dict[str, Any]]:
+def get_exercise_template(exercise_template_id: str) -> Optional[dict[str, Any]]:
     """
     Fetch exercise template details from Hevy API.
     
+    Synchronous variant for legacy callers, uses the pooled requests session.
+    
     Args:
         exercise_template_id: ID of the exercise template to fetch
         
     Returns:
         Dictionary containing exercise template details, or None if error
     """
-    hevy_api_key = os.environ.get("HEVY_API_KEY")
-    
-    if not hevy_api_key:
-        logging.error("HEVY_API_KEY not configured")
-        return None
-    
-    headers = {
-        "api-key": hevy_api_key,
-        "Content-Type": "application/json"
-    }
+    cached = _template_cache.get(exercise_template_id)
+    if cached is not None:
+        return cached
     
-    try:
-        response = requests.get(
-            f"https://api.hevyapp.com/v1/exercise_templates/{exercise_template_id}",
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            logging.error(f"Hevy API error for exercise template: {response.status_code} - {response.text}")
-            return None
-        
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch exercise template from Hevy API: {str(e)}")
-        return None
+    template = _fetch_hevy_api_sync(f"{_HEVY_BASE_URL}/exercise_templates/{exercise_template_id}")
+    if template:
+        _template_cache[exercise_template_id] = template
+    return template
+
 
+if sys.version_info >= (3, 11):
+    # Python 3.11+ parses the trailing 'Z' natively
+    _parse_iso_datetime = datetime.fromisoformat
+else:
+    def _parse_iso_datetime(value: str) -> datetime:
+        """Parse an ISO 8601 timestamp, accepting a trailing 'Z' on older runtimes."""
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
-def calculate_workout_duration(workout_data: Dict[str, Any]) -> Optional[float]:
+
+def calculate_workout_duration(workout_data: dict[str, Any]) -> Optional[float]:
     """
     Calculate workout duration in minutes from workout data.
     
@@ -143,80 +150,74 @@ def calculate_workout_duration(workout_data: Dict[str, Any]) -> Optional[float]:
         end_time_str = workout_data.get('end_time')
         
         if start_time_str and end_time_str:
-            start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
+            start_time = _parse_iso_datetime(start_time_str)
+            end_time = _parse_iso_datetime(end_time_str)
             duration_seconds = (end_time - start_time).total_seconds()
             return round(duration_seconds / 60.0, 0)
         
         logging.warning("Could not calculate workout duration from available data")
         return None
     except (ValueError, TypeError, KeyError) as e:
-        logging.error(f"Error calculating workout duration: {str(e)}")
+        logging.error("Error calculating workout duration: %s", e)
         return None
 
 
-def extract_unique_exercises(workout_data: Dict[str, Any]) -> list[Dict[str, Any]]:
-    """
-    Extract unique exercises from workout data.
-    
-    Args:
-        workout_data: Workout data from Hevy API
-        
-    Returns:
-        List of unique exercise dictionaries with exercise_template_id and title
-    """
-    exercises = workout_data.get("exercises", [])
-    unique_exercises = {}
+@dataclass(slots=True)
+class ExercisePerf:
+    """Aggregated performance of one exercise within a workout."""
     
-    for exercise in exercises:
-        exercise_template_id = exercise.get("exercise_template_id")
-        if exercise_template_id and exercise_template_id not in unique_exercises:
-            unique_exercises[exercise_template_id] = {
-                "exercise_template_id": exercise_template_id,
-                "title": exercise.get("title", "Unknown Exercise")
-            }
-    
-    return list(unique_exercises.values())
+    exercise_template_id: str
+    title: str
+    total_weight_kg: float = 0.0
+    total_reps: int = 0
+    set_count: int = 0
+
 
+# Set types that do not count towards exercise performance totals
+_SKIPPED_SET_TYPES = frozenset({"warmup", "failure"})
 
-def extract_exercise_performances(workout_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+def extract_exercises_and_performances(workout_data: dict[str, Any]) -> tuple[list[dict[str, Any]], list[ExercisePerf]]:
     """
-    Extract and aggregate exercise performances from workout data.
+    Extract unique exercises and aggregated exercise performances in a single pass.
     
-    Groups sets by exercise and calculates total weight and total reps for each exercise.
+    Groups sets by exercise and calculates total weight (volume) and total reps
+    for each exercise while collecting the unique exercises of the workout.
     
     Args:
         workout_data: Workout data from Hevy API
         
     Returns:
-        List of exercise performance dictionaries with aggregated data
+        Tuple of (unique exercises, exercise performances). Unique exercises are
+        dictionaries with exercise_template_id and title.
     """
     exercises = workout_data.get("exercises", [])
+    unique_exercises = {}
     performances = {}
     
     for exercise in exercises:
         exercise_template_id = exercise.get("exercise_template_id")
-        title = exercise.get("title", "Unknown Exercise")
-        sets = exercise.get("sets", [])
         
         if not exercise_template_id:
             continue
         
-        # Initialize performance entry if not exists
-        if exercise_template_id not in performances:
-            performances[exercise_template_id] = {
+        # Initialize entries on first occurrence of the exercise
+        if exercise_template_id not in unique_exercises:
+            title = exercise.get("title", "Unknown Exercise")
+            unique_exercises[exercise_template_id] = {
                 "exercise_template_id": exercise_template_id,
-                "title": title,
-                "total_weight_kg": 0.0,
-                "total_reps": 0,
-                "set_count": 0
+                "title": title
             }
+            performances[exercise_template_id] = ExercisePerf(exercise_template_id, title)
+        
+        # Aggregate sets data into local counters, written back once per exercise
+        total_weight_kg = 0.0
+        total_reps = 0
+        set_count = 0
         
-        # Aggregate sets data
-        for set_data in sets:
+        for set_data in exercise.get("sets", []):
             # Skip warm-up sets or failed sets
-            set_type = set_data.get("set_type", "normal")
-            if set_type in ["warmup", "failure"]:
+            if set_data.get("set_type") in _SKIPPED_SET_TYPES:
                 continue
             
             reps = set_data.get("reps")
@@ -224,128 +225,250 @@ def extract_exercise_performances(workout_data: Dict[str, Any]) -> List[Dict[str
             
             # Skip sets with missing data
             if reps is None or weight_kg is None:
-                logging.debug(f"Skipping set with missing data: reps={reps}, weight_kg={weight_kg}")
+                logging.debug("Skipping set with missing data: reps=%s, weight_kg=%s", reps, weight_kg)
                 continue
             
-            # Convert to appropriate types
-            try:
-                reps = int(reps) if reps else 0
-                weight_kg = float(weight_kg) if weight_kg else 0.0
-            except (ValueError, TypeError):
-                logging.warning(f"Invalid set data: reps={reps}, weight_kg={weight_kg}")
-                continue
+            # Hevy returns numbers, only convert values of other types
+            if not isinstance(reps, int) or not isinstance(weight_kg, (int, float)):
+                try:
+                    reps = int(reps)
+                    weight_kg = float(weight_kg)
+                except (ValueError, TypeError):
+                    logging.warning("Invalid set data: reps=%s, weight_kg=%s", reps, weight_kg)
+                    continue
             
             # Calculate volume (weight * reps)
-            volume = weight_kg * reps
-            
-            performances[exercise_template_id]["total_weight_kg"] += volume
-            performances[exercise_template_id]["total_reps"] += reps
-            performances[exercise_template_id]["set_count"] += 1
+            total_weight_kg += weight_kg * reps
+            total_reps += reps
+            set_count += 1
+        
+        # The same exercise can appear multiple times in a workout
+        perf = performances[exercise_template_id]
+        perf.total_weight_kg += total_weight_kg
+        perf.total_reps += total_reps
+        perf.set_count += set_count
+    
+    return list(unique_exercises.values()), list(performances.values())
+
+
+def extract_unique_exercises(workout_data: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Extract unique exercises from workout data.
+    
+    Args:
+        workout_data: Workout data from Hevy API
+        
+    Returns:
+        List of unique exercise dictionaries with exercise_template_id and title
+    """
+    return extract_exercises_and_performances(workout_data)[0]
+
+
+def extract_exercise_performances(workout_data: dict[str, Any]) -> list[ExercisePerf]:
+    """
+    Extract and aggregate exercise performances from workout data.
     
-    return list(performances.values())
+    Args:
+        workout_data: Workout data from Hevy API
+        
+    Returns:
+        List of aggregated exercise performances
+    """
+    return extract_exercises_and_performances(workout_data)[1]
 
 
 # ============================================================================
 # Async API Functions for Parallel Processing
 # ============================================================================
 
-async def fetch_hevy_api_async(url: str, session: aiohttp.ClientSession) -> Optional[Dict[str, Any]]:
+# Shared HTTP/2 client, reused across warm invocations. All requests to
+# api.hevyapp.com are multiplexed over one kept-alive TCP/TLS connection.
+# The Functions worker runs every invocation on the same event loop, so the
+# client and its semaphore are created once per process and never replaced.
+_client: Optional[httpx.AsyncClient] = None
+_client_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """
+    Return the shared httpx client, creating it on first use.
+    
+    Returns:
+        Shared httpx AsyncClient
+    """
+    global _client, _client_semaphore
+    
+    if _client is None:
+        # Binding to an IPv4 local address skips the AAAA lookup and IPv6
+        # connect attempts, Azure Functions egress is IPv4 only
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            local_address="0.0.0.0",
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
+        )
+        _client = httpx.AsyncClient(
+            transport=transport,
+            base_url=_HEVY_BASE_URL,
+            headers=_HEVY_HEADERS,
+            timeout=10
+        )
+        # Maximum number of in-flight Hevy API requests, keeps template
+        # fan-out below Hevy's rate limit
+        _client_semaphore = asyncio.Semaphore(int(os.environ.get("HEVY_MAX_CONCURRENCY", "8")))
+    
+    return _client
+
+
+# Routine IDs of recently processed workouts (workout_id -> routine_id)
+_workout_routine_ids: TTLCache = TTLCache(maxsize=256, ttl=86400)
+
+
+async def fetch_hevy_api_async(path: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict[str, Any]]:
     """
     Fetch data from Hevy API asynchronously.
     
     Args:
-        url: Full URL to fetch
-        session: aiohttp ClientSession
+        path: API path relative to the v1 base URL (e.g. "/workouts/{id}")
+        client: httpx AsyncClient (defaults to the shared client)
         
     Returns:
         Dictionary containing API response, or None if error
     """
-    hevy_api_key = os.environ.get("HEVY_API_KEY")
-    
-    if not hevy_api_key:
+    if not _HEVY_HEADERS:
         logging.error("HEVY_API_KEY not configured")
         return None
     
-    headers = {
-        "api-key": hevy_api_key,
-        "Content-Type": "application/json"
-    }
+    shared_client = await _get_client()
+    if client is None:
+        client = shared_client
     
     try:
-        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-            if response.status != 200:
-                text = await response.text()
-                logging.error(f"Hevy API error for {url}: {response.status} - {text}")
-                return None
-            
-            return await response.json()
-    except asyncio.TimeoutError:
-        logging.error(f"Timeout fetching from Hevy API: {url}")
+        async with _client_semaphore:
+            response = await client.get(path)
+        
+        if response.status_code != 200:
+            logging.error("Hevy API error for %s: %s - %s", path, response.status_code, response.text)
+            return None
+        
+        return orjson.loads(response.content)
+    except httpx.TimeoutException:
+        logging.error("Timeout fetching from Hevy API: %s", path)
         return None
     except Exception as e:
-        logging.error(f"Failed to fetch from Hevy API: {url} - {str(e)}")
+        logging.error("Failed to fetch from Hevy API: %s - %s", path, e)
         return None
 
 
-async def get_workout_and_routine_async(workout_id: str) -> tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+async def _fetch_routine_async(routine_id: str) -> Optional[dict[str, Any]]:
+    """
+    Fetch routine details, serving repeat routine IDs from the cache.
+    
+    Args:
+        routine_id: UUID of the routine to fetch
+        
+    Returns:
+        Dictionary containing API response, or None if error
+    """
+    cached = _routine_cache.get(routine_id)
+    if cached is not None:
+        return cached
+    
+    routine_response = await fetch_hevy_api_async(f"/routines/{routine_id}")
+    if routine_response:
+        _routine_cache[routine_id] = routine_response
+    return routine_response
+
+
+async def get_workout_and_routine_async(workout_id: str) -> tuple[Optional[dict[str, Any]], Optional[dict[str, Any]]]:
     """
     Fetch workout and routine details in parallel.
     
+    Hevy fires the webhook again when a workout is edited, so the routine ID
+    of recently seen workouts is remembered. When it is known, the workout and
+    routine requests are issued concurrently instead of one after the other.
+    
     Args:
         workout_id: UUID of the workout to fetch
         
     Returns:
         Tuple of (workout_data, routine_data). routine_data may be None if workout has no routine.
     """
-    async with aiohttp.ClientSession() as session:
-        # Fetch workout first
-        workout_url = f"https://api.hevyapp.com/v1/workouts/{workout_id}"
-        workout_response = await fetch_hevy_api_async(workout_url, session)
-        
-        if not workout_response:
-            return None, None
-        
-        # Extract workout data
-        workout_data = workout_response.get("workout", workout_response)
-        
-        # Check if workout has a routine
-        routine_id = workout_data.get("routine_id")
-        routine_data = None
+    workout_path = f"/workouts/{workout_id}"
+    cached_routine_id = _workout_routine_ids.get(workout_id)
+    
+    if cached_routine_id:
+        # Routine ID known from a previous invocation, fetch both at once
+        workout_response, routine_response = await asyncio.gather(
+            fetch_hevy_api_async(workout_path),
+            _fetch_routine_async(cached_routine_id)
+        )
+    else:
+        workout_response = await fetch_hevy_api_async(workout_path)
+        routine_response = None
+    
+    if not workout_response:
+        return None, None
+    
+    # Extract workout data
+    workout_data = workout_response.get("workout", workout_response)
+    
+    # Check if workout has a routine
+    routine_id = workout_data.get("routine_id")
+    routine_data = None
+    
+    if routine_id:
+        _workout_routine_ids[workout_id] = routine_id
         
-        if routine_id:
-            routine_url = f"https://api.hevyapp.com/v1/routines/{routine_id}"
-            routine_response = await fetch_hevy_api_async(routine_url, session)
-            if routine_response:
-                routine_data = routine_response.get("routine", {})
+        # Only fetch the routine if the speculative request missed
+        if routine_id != cached_routine_id:
+            routine_response = await _fetch_routine_async(routine_id)
         
-        return workout_data, routine_data
+        if routine_response:
+            routine_data = routine_response.get("routine", {})
+    
+    return workout_data, routine_data
 
 
-async def get_exercise_templates_async(exercise_template_ids: List[str]) -> List[Dict[str, Any]]:
+async def get_exercise_templates_async(exercise_template_ids: list[str]) -> dict[str, dict[str, Any]]:
     """
     Fetch multiple exercise templates in parallel.
     
+    Duplicate IDs are fetched once. Templates already in the cache are served
+    from memory, only the misses are requested from the Hevy API.
+    
     Args:
         exercise_template_ids: List of exercise template IDs to fetch
         
     Returns:
-        List of exercise template data dictionaries
+        Dictionary mapping exercise template ID to template data, in request order.
+        Templates that could not be fetched are omitted.
     """
-    async with aiohttp.ClientSession() as session:
+    # Order-preserving dedup
+    unique_ids = list(dict.fromkeys(exercise_template_ids))
+    
+    templates_by_id = {}
+    missing_ids = []
+    for template_id in unique_ids:
+        cached = _template_cache.get(template_id)
+        if cached is not None:
+            templates_by_id[template_id] = cached
+        else:
+            missing_ids.append(template_id)
+    
+    if missing_ids:
         tasks = []
-        for template_id in exercise_template_ids:
-            url = f"https://api.hevyapp.com/v1/exercise_templates/{template_id}"
-            tasks.append(fetch_hevy_api_async(url, session))
+        for template_id in missing_ids:
+            tasks.append(fetch_hevy_api_async(f"/exercise_templates/{template_id}"))
         
-        # Fetch all exercise templates in parallel
+        # Fetch all missing exercise templates in parallel
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Filter out None results and exceptions
-        exercise_templates = []
-        for i, result in enumerate(results):
+        for template_id, result in zip(missing_ids, results):
             if isinstance(result, Exception):
-                logging.error(f"Exception fetching exercise template {exercise_template_ids[i]}: {str(result)}")
+                logging.error("Exception fetching exercise template %s: %s", template_id, result)
             elif result is not None:
-                exercise_templates.append(result)
-        
-        return exercise_templates
+                _template_cache[template_id] = result
+                templates_by_id[template_id] = result
+    
+    # Keep the order of the requested IDs, dropping failed fetches
+    return {template_id: templates_by_id[template_id] for template_id in unique_ids if template_id in templates_by_id}
@@ -3,40 +3,44 @@
 import azure.functions as func
 import logging
 import os
-import json
-from datetime import datetime
+import orjson
 
-from shared.validators import sanitize_text_input, MAX_REQUEST_SIZE
+from shared.validators import sanitize_id, MAX_REQUEST_SIZE
 
 
-def hevy_workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
+async def hevy_workout_webhook(req: func.HttpRequest, msg: func.Out[str]) -> func.HttpResponse:
     """
     Webhook endpoint to receive workout data from Hevy app.
     
+    Validates the request and hands the workout off to the processing queue,
+    so Hevy gets an acknowledgement without waiting for the Notion sync.
+    
     Accepts JSON payload with:
     - id: webhook event ID
     - payload.workoutId: UUID of the workout
     
+    Args:
+        req: HTTP request from Hevy
+        msg: Queue output binding for the processing queue
+    
     Returns:
-        JSON response with processing status
+        JSON response with 202 status once the workout has been queued
     """
     logging.info('Hevy webhook received.')
     
     try:
         # Validate request size
         content_length = req.headers.get('Content-Length')
-        if content_length:
-            content_length_int = int(content_length)
-            if content_length_int > MAX_REQUEST_SIZE:
-                logging.warning(f"Request too large: {content_length_int} bytes")
-                return func.HttpResponse(
-                    f"Request too large. Maximum size is {MAX_REQUEST_SIZE / (1024*1024):.0f}MB",
-                    status_code=413
-                )
+        if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+            logging.warning("Request too large: %s bytes", content_length)
+            return func.HttpResponse(
+                f"Request too large. Maximum size is {MAX_REQUEST_SIZE / (1024*1024):.0f}MB",
+                status_code=413
+            )
         
         # Parse JSON payload
         try:
-            req_body = req.get_json()
+            req_body = orjson.loads(req.get_body())
         except ValueError:
             logging.error("Invalid JSON payload")
             return func.HttpResponse(
@@ -56,11 +60,18 @@ def hevy_workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
                 status_code=400
             )
         
-        # Sanitize inputs
-        webhook_id = sanitize_text_input(webhook_id, "webhook_id", max_length=100)
-        workout_id = sanitize_text_input(workout_id, "workout_id", max_length=100)
+        # Validate ID format
+        try:
+            webhook_id = sanitize_id(webhook_id, "webhook_id")
+            workout_id = sanitize_id(workout_id, "workout_id")
+        except ValueError as e:
+            logging.warning("Invalid webhook payload: %s", e)
+            return func.HttpResponse(
+                str(e),
+                status_code=400
+            )
         
-        logging.info(f"Processing Hevy webhook - ID: {webhook_id}, Workout ID: {workout_id}")
+        logging.info("Received Hevy webhook - ID: %s, Workout ID: %s", webhook_id, workout_id)
         
         # Check for required environment variables
         hevy_api_key = os.environ.get("HEVY_API_KEY")
@@ -81,54 +92,112 @@ def hevy_workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
                 status_code=500
             )
         
-        # Import handlers (done here to avoid import errors during validation)
-        import asyncio
-        from .hevy_api import (
-            get_workout_and_routine_async, 
-            get_exercise_templates_async,
-            extract_unique_exercises,
-            extract_exercise_performances,
-            calculate_workout_duration
-        )
-        from .notion_handler import (
-            add_workout_to_notion, 
-            process_exercises_async,
-            process_exercise_performances_async
-        )
-        
-        # Fetch workout and routine in parallel
-        logging.info(f"Fetching workout and routine details from Hevy API: {workout_id}")
-        try:
-            workout_data, routine_data = asyncio.run(get_workout_and_routine_async(workout_id))
-        except Exception as e:
-            logging.error(f"Error fetching workout/routine data: {str(e)}")
-            return func.HttpResponse(
-                "Failed to fetch workout data from Hevy API",
-                status_code=502
-            )
+        # Queue the workout for processing
+        msg.set(orjson.dumps({"webhook_id": webhook_id, "workout_id": workout_id}).decode())
+        logging.info("Queued Hevy workout for processing: %s", workout_id)
         
-        if not workout_data:
-            logging.error(f"Failed to fetch workout data for ID: {workout_id}")
-            return func.HttpResponse(
-                "Failed to fetch workout data from Hevy API",
-                status_code=502
-            )
+        return func.HttpResponse(
+            orjson.dumps({
+                "status": "accepted",
+                "webhook_id": webhook_id,
+                "workout_id": workout_id
+            }),
+            status_code=202,
+            mimetype="application/json"
+        )
         
-        # Extract routine name if available
-        routine_name = None
-        if routine_data:
-            routine_name = routine_data.get("title")
-            logging.info(f"Retrieved routine name: {routine_name}")
+    except Exception as e:
+        logging.error("Unexpected error processing Hevy webhook: %s", e, exc_info=True)
+        return func.HttpResponse(
+            "Internal server error",
+            status_code=500
+        )
+
+
+async def hevy_workout_queue_handler(msg: func.QueueMessage) -> None:
+    """
+    Process a Hevy workout queued by the webhook endpoint.
+    
+    Exceptions are propagated so the Functions host retries the message and
+    moves it to the poison queue after the maximum dequeue count.
+    
+    Args:
+        msg: Queue message with webhook_id and workout_id
+    """
+    body = orjson.loads(msg.get_body())
+    webhook_id = body["webhook_id"]
+    workout_id = body["workout_id"]
+    
+    logging.info(
+        "Processing Hevy workout - ID: %s, Workout ID: %s (attempt %s)",
+        webhook_id, workout_id, msg.dequeue_count
+    )
+    
+    result = await process_hevy_workout(webhook_id, workout_id)
+    
+    logging.info(
+        "Hevy webhook processed successfully: %s (%s Notion page %s, %s exercises, %s performances)",
+        webhook_id, result["action"], result["notion_page_id"],
+        result["exercises_processed"], result["performances_processed"]
+    )
+
+
+async def process_hevy_workout(webhook_id: str, workout_id: str) -> dict:
+    """
+    Sync a Hevy workout with its exercises and performances to Notion.
+    
+    Args:
+        webhook_id: Hevy webhook event ID
+        workout_id: UUID of the workout
         
-        # Calculate duration if not present
-        if "duration_seconds" not in workout_data:
-            duration = calculate_workout_duration(workout_data)
-            if duration:
-                workout_data["duration_seconds"] = duration * 60  # Convert back to seconds
+    Returns:
+        Dictionary with the action taken, the Notion page ID and the number of
+        exercises and performances processed
         
-        # Extract unique exercises and fetch templates in parallel
-        unique_exercises = extract_unique_exercises(workout_data)
-        logging.info(f"Found {len(unique_exercises)} unique exercises in workout")
+    Raises:
+        RuntimeError: If the workout could not be fetched from Hevy API
+        Exception: If the Notion workout page could not be created or updated
+    """
+    import asyncio
+    from .hevy_api import (
+        get_workout_and_routine_async, 
+        get_exercise_templates_async,
+        extract_exercises_and_performances,
+        calculate_workout_duration
+    )
+    from .notion_handler import (
+        add_workout_to_notion_async,
+        process_exercises_async,
+        process_exercise_performances_async
+    )
+    
+    # Fetch workout and routine
+    logging.info("Fetching workout and routine details from Hevy API: %s", workout_id)
+    workout_data, routine_data = await get_workout_and_routine_async(workout_id)
+    
+    if not workout_data:
+        raise RuntimeError(f"Failed to fetch workout data from Hevy API for ID: {workout_id}")
+    
+    # Extract routine name if available
+    routine_name = None
+    if routine_data:
+        routine_name = routine_data.get("title")
+        logging.info("Retrieved routine name: %s", routine_name)
+    
+    # Calculate duration if not present
+    if "duration_seconds" not in workout_data:
+        duration = calculate_workout_duration(workout_data)
+        if duration:
+            workout_data["duration_seconds"] = duration * 60  # Convert back to seconds
+    
+    # Start the workout page write right away, it does not depend on the exercises
+    logging.info("Creating or updating Notion page for workout")
+    workout_task = asyncio.create_task(add_workout_to_notion_async(workout_data, routine_name))
+    
+    try:
+        # Extract unique exercises and performances, then fetch templates in parallel
+        unique_exercises, exercise_performances = extract_exercises_and_performances(workout_data)
+        logging.info("Found %s unique exercises in workout", len(unique_exercises))
         
         processed_exercises = []
         
@@ -137,100 +206,62 @@ def hevy_workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
             exercise_template_ids = [ex["exercise_template_id"] for ex in unique_exercises]
             
             # Fetch all exercise templates in parallel
-            logging.info(f"Fetching {len(exercise_template_ids)} exercise templates in parallel")
+            logging.info("Fetching %s exercise templates in parallel", len(exercise_template_ids))
             try:
-                exercise_templates = asyncio.run(get_exercise_templates_async(exercise_template_ids))
-                logging.info(f"Successfully fetched {len(exercise_templates)} exercise templates")
+                exercise_templates = await get_exercise_templates_async(exercise_template_ids)
+                logging.info("Successfully fetched %s exercise templates", len(exercise_templates))
             except Exception as e:
-                logging.error(f"Error fetching exercise templates: {str(e)}")
-                exercise_templates = []
+                logging.error("Error fetching exercise templates: %s", e)
+                exercise_templates = {}
             
             # Process all exercises in parallel with Notion
             if exercise_templates:
-                logging.info(f"Processing {len(exercise_templates)} exercises in Notion (parallel)")
+                logging.info("Processing %s exercises in Notion (parallel)", len(exercise_templates))
                 try:
-                    processed_exercises = asyncio.run(process_exercises_async(exercise_templates))
-                    logging.info(f"Successfully processed {len(processed_exercises)} exercises in Notion")
+                    processed_exercises = await process_exercises_async(list(exercise_templates.values()))
+                    logging.info("Successfully processed %s exercises in Notion", len(processed_exercises))
                 except Exception as e:
-                    logging.error(f"Error processing exercises in Notion: {str(e)}")
+                    logging.error("Error processing exercises in Notion: %s", e)
                     processed_exercises = []
         
-        logging.info(f"Successfully processed {len(processed_exercises)} exercises")
+        logging.info("Successfully processed %s exercises", len(processed_exercises))
+        
+        # Wait for the workout page, which is needed for the performance relations
+        notion_response, action = await workout_task
+    finally:
+        # Don't leave the workout write running unobserved if anything above failed
+        if not workout_task.done():
+            workout_task.cancel()
+    
+    notion_page_id = notion_response.get("id")
+    logging.info("Successfully %s Notion page: %s", action, notion_page_id)
+    
+    # Process exercise performances in parallel
+    processed_performances = []
+    
+    if exercise_performances and processed_exercises:
+        # Build mapping from exercise_template_id to Notion page ID
+        exercise_id_to_page = {
+            ex["exercise_template_id"]: ex["notion_page_id"]
+            for ex in processed_exercises
+            if ex.get("notion_page_id")
+        }
         
-        # Create or update Notion page with workout data
+        logging.info("Processing %s exercise performances in parallel", len(exercise_performances))
         try:
-            logging.info("Creating or updating Notion page for workout")
-            notion_response = add_workout_to_notion(workout_data, routine_name)
-            notion_page_id = notion_response.get("id")
-            
-            # Determine if it was created or updated based on the response
-            # Notion returns 'created_time' and 'last_edited_time' in the response
-            created_time = notion_response.get("created_time", "")
-            last_edited_time = notion_response.get("last_edited_time", "")
-            was_updated = created_time != last_edited_time
-            
-            action = "updated" if was_updated else "created"
-            logging.info(f"Successfully {action} Notion page: {notion_page_id}")
-            
-            # Process exercise performances in parallel
-            processed_performances = []
-            exercise_performances = extract_exercise_performances(workout_data)
-            
-            if exercise_performances and processed_exercises:
-                # Build mapping from exercise_template_id to Notion page ID
-                exercise_id_to_page = {
-                    ex["exercise_template_id"]: ex["notion_page_id"]
-                    for ex in processed_exercises
-                    if ex.get("notion_page_id")
-                }
-                
-                logging.info(f"Processing {len(exercise_performances)} exercise performances in parallel")
-                try:
-                    processed_performances = asyncio.run(
-                        process_exercise_performances_async(
-                            exercise_performances,
-                            notion_page_id,
-                            exercise_id_to_page
-                        )
-                    )
-                    logging.info(f"Successfully processed {len(processed_performances)} exercise performances")
-                except Exception as e:
-                    logging.error(f"Error processing exercise performances: {str(e)}")
-                    processed_performances = []
-            
-            response_data = {
-                "status": "success",
-                "webhook_id": webhook_id,
-                "workout_id": workout_id,
-                "notion_page_id": notion_page_id,
-                "routine_name": routine_name,
-                "exercises_processed": len(processed_exercises),
-                "exercises": processed_exercises,
-                "performances_processed": len(processed_performances),
-                "performances": processed_performances,
-                "action": action,
-                "message": f"Workout successfully {action} in Notion",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-        except Exception as e:
-            logging.error(f"Failed to create Notion page: {str(e)}")
-            return func.HttpResponse(
-                f"Failed to create Notion page: {str(e)}",
-                status_code=500
+            processed_performances = await process_exercise_performances_async(
+                exercise_performances,
+                notion_page_id,
+                exercise_id_to_page
             )
-        
-        logging.info(f"Hevy webhook processed successfully: {webhook_id}")
-        
-        return func.HttpResponse(
-            json.dumps(response_data),
-            status_code=200,
-            mimetype="application/json"
-        )
-        
-    except Exception as e:
-        logging.error(f"Unexpected error processing Hevy webhook: {str(e)}", exc_info=True)
-        return func.HttpResponse(
-            "Internal server error",
-            status_code=500
-        )
+            logging.info("Successfully processed %s exercise performances", len(processed_performances))
+        except Exception as e:
+            logging.error("Error processing exercise performances: %s", e)
+            processed_performances = []
+    
+    return {
+        "action": action,
+        "notion_page_id": notion_page_id,
+        "exercises_processed": len(processed_exercises),
+        "performances_processed": len(processed_performances)
+    }
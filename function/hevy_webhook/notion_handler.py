@@ -1,14 +1,125 @@
 """Notion database integration for Hevy workout entries."""
 
+import functools
+import hashlib
 import logging
 import os
-import requests
+import socket
 import asyncio
 import aiohttp
-from typing import Dict, Any, Optional, List
+import orjson
+import yarl
+from typing import Dict, Any, Optional, List, Tuple
+from cachetools import TTLCache
 
+from .hevy_api import ExercisePerf
 
-def add_workout_to_notion(workout_data: Dict[str, Any], routine_name: Optional[str] = None) -> Dict[str, Any]:
+# Configuration is constant for the lifetime of the worker, read it once
+_NOTION_API_KEY = os.environ.get("NOTION_API_KEY")
+_NOTION_WORKOUTS_DB_ID = os.environ.get("NOTION_WORKOUTS_DATABASE_ID")
+_NOTION_EXERCISES_DB_ID = os.environ.get("NOTION_EXERCISES_DATABASE_ID")
+_NOTION_PERFORMANCES_DB_ID = os.environ.get("NOTION_EXERCISE_PERFORMANCES_DATABASE_ID")
+
+# Notion API headers, shared by all requests
+_HEADERS = {
+    "Authorization": f"Bearer {_NOTION_API_KEY}",
+    "Content-Type": "application/json",
+    "Notion-Version": "2022-06-28"
+}
+
+# Default timeout for async Notion requests
+_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Notion endpoints as parsed URLs, so aiohttp does not re-parse them per request
+_NOTION_API_URL = yarl.URL("https://api.notion.com/v1")
+_PAGES_URL = _NOTION_API_URL / "pages"
+
+
+@functools.lru_cache(maxsize=8)
+def _query_url(database_id: str) -> yarl.URL:
+    """
+    Return the query endpoint of a Notion database.
+    
+    Args:
+        database_id: Notion database ID
+        
+    Returns:
+        URL of the database query endpoint
+    """
+    return _NOTION_API_URL / "databases" / database_id / "query"
+
+
+# ============================================================================
+# Async Notion Functions for Parallel Processing
+# ============================================================================
+
+# Shared session, reused across warm invocations so TCP/TLS connections to
+# api.notion.com stay alive in aiohttp's connection pool. The Functions worker
+# runs every invocation on the same event loop, so the session and its
+# semaphore are created once per process and never replaced.
+_session: Optional[aiohttp.ClientSession] = None
+_session_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """
+    Return the shared Notion aiohttp session, creating it on first use.
+    
+    The session carries the Notion API headers, so individual requests don't
+    rebuild them.
+    
+    Returns:
+        Shared aiohttp ClientSession
+    """
+    global _session, _session_semaphore
+    
+    if _session is None:
+        # IPv4 only, Azure Functions egress has no IPv6 and the AAAA lookup
+        # only adds latency to the first request
+        connector = aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=16,
+            ttl_dns_cache=600,
+            family=socket.AF_INET,
+            keepalive_timeout=60
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers=_HEADERS,
+            timeout=_TIMEOUT
+        )
+        # Maximum number of exercises/performances processed concurrently.
+        # Notion allows an average of three requests per second per
+        # integration, higher fan-out only produces 429 responses.
+        _session_semaphore = asyncio.Semaphore(int(os.environ.get("NOTION_MAX_CONCURRENCY", "3")))
+    
+    return _session
+
+
+async def _bounded(coro):
+    """
+    Run a coroutine while holding a Notion concurrency slot.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        Result of the coroutine
+    """
+    async with _session_semaphore:
+        return await coro
+
+
+# Notion pages of workouts written by this instance (hevy_id -> page_id), so a
+# redelivered or updated workout is patched without searching for it first.
+# Entries expire so pages deleted or archived in Notion are looked up again.
+_workout_page_cache: TTLCache = TTLCache(maxsize=256, ttl=3600)
+
+
+async def add_workout_to_notion_async(
+    workout_data: Dict[str, Any],
+    routine_name: Optional[str] = None
+) -> Tuple[Dict[str, Any], str]:
     """
     Add or update a Hevy workout entry in the Notion Workouts database.
     
@@ -20,24 +131,18 @@ def add_workout_to_notion(workout_data: Dict[str, Any], routine_name: Optional[s
         routine_name: Name of the routine (e.g., "Upper Body 💪")
         
     Returns:
-        Response from Notion API
+        Tuple of (response from Notion API, "created" or "updated")
         
     Raises:
         ValueError: If required environment variables are not set
-        requests.HTTPError: If Notion API request fails
+        aiohttp.ClientResponseError: If Notion API request fails
     """
-    notion_api_key = os.environ.get("NOTION_API_KEY")
-    notion_workouts_db_id = os.environ.get("NOTION_WORKOUTS_DATABASE_ID")
+    notion_workouts_db_id = _NOTION_WORKOUTS_DB_ID
     
-    if not notion_api_key or not notion_workouts_db_id:
+    if not _NOTION_API_KEY or not notion_workouts_db_id:
         raise ValueError("NOTION_API_KEY and NOTION_WORKOUTS_DATABASE_ID environment variables must be set")
     
-    # Prepare Notion API headers
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
+    session = await _get_session()
     
     # Extract workout ID
     workout_id = workout_data.get("id", "")
@@ -47,7 +152,7 @@ def add_workout_to_notion(workout_data: Dict[str, Any], routine_name: Optional[s
     start_time = workout_data.get("start_time")
     if start_time:
         # Hevy uses ISO 8601 format
-        workout_date = start_time.split('T')[0]  # Extract just the date part
+        workout_date = start_time.partition('T')[0]  # Extract just the date part
     
     # Calculate duration in minutes
     duration_minutes = None
@@ -57,298 +162,278 @@ def add_workout_to_notion(workout_data: Dict[str, Any], routine_name: Optional[s
     # Build properties according to Notion database schema
     properties = {
         "Hevy ID": {
-            "title": [
-                {
-                    "text": {
-                        "content": workout_id
-                    }
-                }
-            ]
+            "title": [{"text": {"content": workout_id}}]
         }
     }
     
-    # Add workout date if available
     if workout_date:
         properties["Workout Date"] = {
-            "date": {
-                "start": workout_date
-            }
+            "date": {"start": workout_date}
         }
     
-    # Add duration if available
     if duration_minutes is not None:
         properties["Duration"] = {
             "number": round(duration_minutes, 2)
         }
     
-    # Add routine as select option if provided
+    # Add routine as select option, Notion creates missing options automatically
     if routine_name:
         properties["Routine"] = {
-            "select": {
-                "name": routine_name
-            }
+            "select": {"name": routine_name}
         }
     
-    # Check if workout already exists by searching for Hevy ID
-    search_payload = {
-        "filter": {
-            "property": "Hevy ID",
-            "title": {
-                "equals": workout_id
+    # A page cached for a workout written by this instance skips the search
+    page_id = _workout_page_cache.get(workout_id)
+    if not page_id:
+        # Check if workout already exists by searching for Hevy ID
+        search_payload = {
+            "filter": {
+                "property": "Hevy ID",
+                "title": {"equals": workout_id}
             }
         }
-    }
-    
-    try:
-        search_response = requests.post(
-            f"https://api.notion.com/v1/databases/{notion_workouts_db_id}/query",
-            headers=headers,
-            json=search_payload,
-            timeout=10
-        )
         
-        if search_response.status_code == 200:
-            results = search_response.json().get("results", [])
-            if results:
-                # Workout already exists, update it
-                page_id = results[0]["id"]
-                logging.info(f"Updating existing workout: Hevy ID {workout_id}")
-                
-                update_response = requests.patch(
-                    f"https://api.notion.com/v1/pages/{page_id}",
-                    headers=headers,
-                    json={"properties": properties},
-                    timeout=10
-                )
-                
-                if update_response.status_code != 200:
-                    logging.error(f"Failed to update workout: {update_response.status_code} - {update_response.text}")
-                    update_response.raise_for_status()
-                
-                return update_response.json()
-    except requests.exceptions.RequestException as e:
-        logging.warning(f"Could not search for existing workout: {str(e)}. Will create new entry.")
+        try:
+            async with session.post(
+                _query_url(notion_workouts_db_id),
+                data=orjson.dumps(search_payload)
+            ) as search_response:
+                if search_response.status == 200:
+                    results = orjson.loads(await search_response.read()).get("results", [])
+                    if results:
+                        page_id = results[0]["id"]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"Could not search for existing workout: {str(e)}. Will create new entry.")
+    
+    if page_id:
+        # Workout already exists, update it
+        logging.info(f"Updating existing workout: Hevy ID {workout_id}")
+        
+        async with session.patch(
+            _PAGES_URL / page_id,
+            data=orjson.dumps({"properties": properties})
+        ) as update_response:
+            if update_response.status != 200:
+                text = await update_response.text()
+                logging.error(f"Failed to update workout: {update_response.status} - {text}")
+                # The cached page may have been deleted in Notion
+                _workout_page_cache.pop(workout_id, None)
+                update_response.raise_for_status()
+            
+            result = orjson.loads(await update_response.read())
+            if workout_id:
+                _workout_page_cache[workout_id] = page_id
+            return result, "updated"
     
     # Create new workout entry
     logging.info(f"Creating new workout: Hevy ID {workout_id}")
     
-    # Prepare the request payload
     payload = {
-        "parent": {
-            "database_id": notion_workouts_db_id
-        },
+        "parent": {"database_id": notion_workouts_db_id},
         "properties": properties
     }
     
-    # Make the API request to create a page in the database
-    response = requests.post(
-        "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload,
-        timeout=10
-    )
-    
-    if response.status_code != 200:
-        logging.error(f"Notion API error: {response.status_code} - {response.text}")
-        response.raise_for_status()
-    
-    return response.json()
+    async with session.post(
+        _PAGES_URL,
+        data=orjson.dumps(payload)
+    ) as response:
+        if response.status != 200:
+            text = await response.text()
+            logging.error(f"Notion API error: {response.status} - {text}")
+            response.raise_for_status()
+        
+        result = orjson.loads(await response.read())
+        if workout_id and result.get("id"):
+            _workout_page_cache[workout_id] = result["id"]
+        return result, "created"
+
+
+# Exercise templates recur across workouts. Remember the Notion page and a hash
+# of the last written properties per Hevy ID (hevy_id -> (page_id, hash)), so
+# unchanged exercises are not searched or written again. Entries expire so
+# pages deleted or archived in Notion are looked up again.
+_exercise_page_cache: TTLCache = TTLCache(maxsize=512, ttl=3600)
+
 
+# Maximum number of Hevy IDs per batched exercise lookup. Larger workouts are
+# split into several `or` queries, which run concurrently.
+_EXERCISE_QUERY_CHUNK_SIZE = 25
 
-def add_exercise_to_notion(exercise_template_data: Dict[str, Any]) -> Dict[str, Any]:
+
+async def _query_exercise_chunk_async(
+    session: aiohttp.ClientSession,
+    notion_exercises_db_id: str,
+    exercise_ids: List[str]
+) -> Optional[Dict[str, str]]:
     """
-    Add or update an exercise entry in the Notion Exercises database.
+    Look up existing exercise pages for a chunk of Hevy IDs with a single `or` query.
     
     Args:
-        exercise_template_data: Exercise template data from Hevy API
+        session: Shared Notion aiohttp ClientSession
+        notion_exercises_db_id: Notion Exercises database ID
+        exercise_ids: Hevy exercise template IDs to look up
         
     Returns:
-        Response from Notion API
-        
-    Raises:
-        ValueError: If required environment variables are not set
-        requests.HTTPError: If Notion API request fails
+        Dictionary mapping Hevy ID to Notion page ID for exercises that already exist,
+        or None if the lookup failed
     """
-    notion_api_key = os.environ.get("NOTION_API_KEY")
-    notion_exercises_db_id = os.environ.get("NOTION_EXERCISES_DATABASE_ID")
-    
-    if not notion_api_key or not notion_exercises_db_id:
-        raise ValueError("NOTION_API_KEY and NOTION_EXERCISES_DATABASE_ID environment variables must be set")
-    
-    # Prepare Notion API headers
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    # Extract exercise template fields
-    # Hevy API returns exercise_template wrapped in "exercise_template" object
-    exercise_template = exercise_template_data.get("exercise_template", exercise_template_data)
-    
-    exercise_id = exercise_template.get("id", "")
-    exercise_title = exercise_template.get("title", "Unknown Exercise")
-    primary_muscle = exercise_template.get("primary_muscle_group", "")
-    secondary_muscles = exercise_template.get("secondary_muscle_groups", [])
-    
-    # Build properties according to Notion database schema
-    properties = {
-        "Name": {
-            "title": [
-                {
-                    "text": {
-                        "content": exercise_title
-                    }
-                }
+    query_payload = {
+        "filter": {
+            "or": [
+                {"property": "Hevy ID", "rich_text": {"equals": exercise_id}}
+                for exercise_id in exercise_ids
             ]
         },
-        "Hevy ID": {
-            "rich_text": [
-                {
-                    "text": {
-                        "content": exercise_id
-                    }
-                }
-            ]
-        }
-    }
-    
-    # Add primary muscle group if available (select type)
-    if primary_muscle:
-        # Capitalize first letter for consistency
-        primary_muscle_formatted = primary_muscle.capitalize()
-        properties["Primary Muscle Group"] = {
-            "select": {
-                "name": primary_muscle_formatted
-            }
-        }
-    
-    # Add secondary muscle groups if available
-    if secondary_muscles and isinstance(secondary_muscles, list):
-        # Filter out empty strings and format
-        formatted_muscles = [
-            {"name": muscle.capitalize()} 
-            for muscle in secondary_muscles 
-            if muscle
-        ]
-        if formatted_muscles:
-            properties["Secondary Muscle Groups"] = {
-                "multi_select": formatted_muscles
-            }
-    
-    # Check if exercise already exists by searching for Hevy ID
-    # First, try to find existing exercise
-    search_payload = {
-        "filter": {
-            "property": "Hevy ID",
-            "rich_text": {
-                "equals": exercise_id
-            }
-        }
+        "page_size": 100
     }
     
+    existing_pages = {}
     try:
-        search_response = requests.post(
-            f"https://api.notion.com/v1/databases/{notion_exercises_db_id}/query",
-            headers=headers,
-            json=search_payload,
-            timeout=10
-        )
-        
-        if search_response.status_code == 200:
-            results = search_response.json().get("results", [])
-            if results:
-                # Exercise already exists, update it
-                page_id = results[0]["id"]
-                logging.info(f"Updating existing exercise: {exercise_title} (Hevy ID: {exercise_id})")
-                
-                update_response = requests.patch(
-                    f"https://api.notion.com/v1/pages/{page_id}",
-                    headers=headers,
-                    json={"properties": properties},
-                    timeout=10
-                )
-                
-                if update_response.status_code != 200:
-                    logging.error(f"Failed to update exercise: {update_response.status_code} - {update_response.text}")
-                    update_response.raise_for_status()
-                
-                return update_response.json()
-    except requests.exceptions.RequestException as e:
-        logging.warning(f"Could not search for existing exercise: {str(e)}. Will create new entry.")
+        while True:
+            async with session.post(
+                _query_url(notion_exercises_db_id),
+                data=orjson.dumps(query_payload)
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    logging.warning("Batched exercise lookup failed: %s - %s", response.status, text)
+                    return None
+                data = orjson.loads(await response.read())
+            
+            for page in data.get("results", []):
+                rich_text = page.get("properties", {}).get("Hevy ID", {}).get("rich_text", [])
+                hevy_id = "".join(part.get("plain_text", "") for part in rich_text)
+                # Keep the first match, like the individual search does
+                if hevy_id and hevy_id not in existing_pages:
+                    existing_pages[hevy_id] = page["id"]
+            
+            if not data.get("has_more"):
+                break
+            query_payload["start_cursor"] = data.get("next_cursor")
+    except Exception as e:
+        logging.warning("Batched exercise lookup failed: %s", e)
+        return None
     
-    # Create new exercise entry
-    logging.info(f"Creating new exercise: {exercise_title} (Hevy ID: {exercise_id})")
+    return existing_pages
+
+
+async def _query_exercise_pages_async(
+    session: aiohttp.ClientSession,
+    notion_exercises_db_id: str,
+    exercise_ids: List[str]
+) -> Optional[Dict[str, str]]:
+    """
+    Look up existing exercise pages for a batch of Hevy IDs.
     
-    payload = {
-        "parent": {
-            "database_id": notion_exercises_db_id
-        },
-        "properties": properties
-    }
+    The IDs are queried in chunks of `_EXERCISE_QUERY_CHUNK_SIZE`, all chunks
+    concurrently. Result pages of one query are still fetched in order, as
+    Notion only hands out the next cursor with the previous page.
     
-    response = requests.post(
-        "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload,
-        timeout=10
-    )
+    Args:
+        session: Shared Notion aiohttp ClientSession
+        notion_exercises_db_id: Notion Exercises database ID
+        exercise_ids: Hevy exercise template IDs to look up
+        
+    Returns:
+        Dictionary mapping Hevy ID to Notion page ID for exercises that already exist,
+        or None if the lookup failed
+    """
+    exercise_ids = [exercise_id for exercise_id in exercise_ids if exercise_id]
+    if not exercise_ids:
+        return {}
+    
+    chunks = [
+        exercise_ids[i:i + _EXERCISE_QUERY_CHUNK_SIZE]
+        for i in range(0, len(exercise_ids), _EXERCISE_QUERY_CHUNK_SIZE)
+    ]
+    results = await asyncio.gather(*[
+        _query_exercise_chunk_async(session, notion_exercises_db_id, chunk)
+        for chunk in chunks
+    ])
+    
+    existing_pages = {}
+    for result in results:
+        if result is None:
+            return None
+        existing_pages.update(result)
+    
+    return existing_pages
+
+
+@functools.lru_cache(maxsize=64)
+def _muscle_option(muscle: str) -> Dict[str, str]:
+    """
+    Return the Notion select option for a Hevy muscle group.
     
-    if response.status_code != 200:
-        logging.error(f"Notion API error: {response.status_code} - {response.text}")
-        response.raise_for_status()
+    Muscle groups come from a small fixed set, so the options are built once
+    and shared between payloads. They are only serialized, never modified.
     
-    return response.json()
+    Args:
+        muscle: Hevy muscle group name (e.g., "chest")
+        
+    Returns:
+        Select option with the capitalized name
+    """
+    return {"name": muscle.capitalize()}
 
 
-def ensure_routine_option_exists(routine_name: str) -> bool:
+def _build_exercise_properties(
+    title: str,
+    exercise_id: str,
+    primary_muscle: Optional[str],
+    secondary_muscles: Optional[List[str]]
+) -> Dict[str, Any]:
     """
-    Check if a routine name exists as a select option in the Notion database.
-    If not, the option will be automatically created by Notion when adding the workout.
+    Build the Notion Exercises database properties for an exercise template.
     
     Args:
-        routine_name: Name of the routine to check
+        title: Exercise title
+        exercise_id: Hevy exercise template ID
+        primary_muscle: Primary muscle group, if any
+        secondary_muscles: Secondary muscle groups, if any
         
     Returns:
-        True (option will be created automatically if it doesn't exist)
-        
-    Note:
-        Notion automatically creates new select options when you reference them
-        in a page creation request, so this function is mainly for logging purposes.
+        Notion page properties
     """
-    if routine_name:
-        logging.info(f"Routine '{routine_name}' will be added as select option if it doesn't exist")
-    return True
-
+    properties = {
+        "Name": {"title": [{"text": {"content": title}}]},
+        "Hevy ID": {"rich_text": [{"text": {"content": exercise_id}}]}
+    }
+    
+    if primary_muscle:
+        properties["Primary Muscle Group"] = {"select": _muscle_option(primary_muscle)}
+    
+    if secondary_muscles and isinstance(secondary_muscles, list):
+        formatted_muscles = [_muscle_option(muscle) for muscle in secondary_muscles if muscle]
+        if formatted_muscles:
+            properties["Secondary Muscle Groups"] = {"multi_select": formatted_muscles}
+    
+    return properties
 
-# ============================================================================
-# Async Notion Functions for Parallel Processing
-# ============================================================================
 
 async def process_exercise_async(
     exercise_template: Dict[str, Any],
     session: aiohttp.ClientSession,
-    notion_api_key: str,
-    notion_exercises_db_id: str
+    notion_exercises_db_id: str,
+    existing_pages: Optional[Dict[str, str]] = None,
+    cached_page: Optional[Tuple[str, str]] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Process a single exercise asynchronously (search, update or create in Notion).
     
     Args:
         exercise_template: Exercise template data from Hevy API
-        session: aiohttp ClientSession
-        notion_api_key: Notion API key
+        session: Shared Notion aiohttp ClientSession
         notion_exercises_db_id: Notion Exercises database ID
+        existing_pages: Mapping of Hevy ID to existing Notion page ID from a batched
+            lookup. If None, the exercise is searched individually.
+        cached_page: Cached (page_id, hash) taken when the batched lookup was
+            built. Only used together with existing_pages, as exercises with a
+            cached page are left out of that lookup.
         
     Returns:
         Response from Notion API with exercise page info, or None if error
     """
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     # Extract exercise template fields
     template_data = exercise_template.get("exercise_template", exercise_template)
     exercise_id = template_data.get("id", "")
@@ -356,68 +441,67 @@ async def process_exercise_async(
     primary_muscle = template_data.get("primary_muscle_group", "")
     secondary_muscles = template_data.get("secondary_muscle_groups", [])
     
-    # Build properties
-    properties = {
-        "Name": {
-            "title": [{"text": {"content": exercise_title}}]
-        },
-        "Hevy ID": {
-            "rich_text": [{"text": {"content": exercise_id}}]
-        }
-    }
-    
-    if primary_muscle:
-        properties["Primary Muscle Group"] = {
-            "select": {"name": primary_muscle.capitalize()}
-        }
+    properties = _build_exercise_properties(exercise_title, exercise_id, primary_muscle, secondary_muscles)
     
-    if secondary_muscles and isinstance(secondary_muscles, list):
-        formatted_muscles = [
-            {"name": muscle.capitalize()} 
-            for muscle in secondary_muscles 
-            if muscle
-        ]
-        if formatted_muscles:
-            properties["Secondary Muscle Groups"] = {
-                "multi_select": formatted_muscles
-            }
+    # Skip Notion entirely if this exact exercise was written before
+    content_hash = hashlib.blake2b(
+        orjson.dumps(properties, option=orjson.OPT_SORT_KEYS),
+        digest_size=8
+    ).hexdigest()
+    if existing_pages is not None:
+        cached = cached_page
+    else:
+        cached = _exercise_page_cache.get(exercise_id)
+    if cached and cached[1] == content_hash:
+        return {"id": cached[0]}
     
     try:
-        # Search for existing exercise
-        search_payload = {
-            "filter": {
-                "property": "Hevy ID",
-                "rich_text": {"equals": exercise_id}
+        if cached:
+            # Page known from a previous write, only the content changed
+            page_id = cached[0]
+        elif existing_pages is not None:
+            # Existence already resolved by the batched query
+            page_id = existing_pages.get(exercise_id)
+        else:
+            page_id = None
+            
+            # Search for existing exercise
+            search_payload = {
+                "filter": {
+                    "property": "Hevy ID",
+                    "rich_text": {"equals": exercise_id}
+                }
             }
-        }
+            
+            async with session.post(
+                _query_url(notion_exercises_db_id),
+                data=orjson.dumps(search_payload)
+            ) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    results = data.get("results", [])
+                    if results:
+                        page_id = results[0]["id"]
         
-        async with session.post(
-            f"https://api.notion.com/v1/databases/{notion_exercises_db_id}/query",
-            headers=headers,
-            json=search_payload,
-            timeout=aiohttp.ClientTimeout(total=10)
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                results = data.get("results", [])
-                
-                if results:
-                    # Update existing exercise
-                    page_id = results[0]["id"]
-                    logging.info(f"Updating existing exercise: {exercise_title} (Hevy ID: {exercise_id})")
-                    
-                    async with session.patch(
-                        f"https://api.notion.com/v1/pages/{page_id}",
-                        headers=headers,
-                        json={"properties": properties},
-                        timeout=aiohttp.ClientTimeout(total=10)
-                    ) as update_response:
-                        if update_response.status == 200:
-                            return await update_response.json()
-                        else:
-                            text = await update_response.text()
-                            logging.error(f"Failed to update exercise: {update_response.status} - {text}")
-                            return None
+        if page_id:
+            # Update existing exercise
+            logging.info(f"Updating existing exercise: {exercise_title} (Hevy ID: {exercise_id})")
+            
+            async with session.patch(
+                _PAGES_URL / page_id,
+                data=orjson.dumps({"properties": properties})
+            ) as update_response:
+                if update_response.status == 200:
+                    result = orjson.loads(await update_response.read())
+                    if exercise_id:
+                        _exercise_page_cache[exercise_id] = (result.get("id", page_id), content_hash)
+                    return result
+                else:
+                    text = await update_response.text()
+                    logging.error(f"Failed to update exercise: {update_response.status} - {text}")
+                    # The cached page may have been deleted in Notion
+                    _exercise_page_cache.pop(exercise_id, None)
+                    return None
         
         # Create new exercise if not found
         logging.info(f"Creating new exercise: {exercise_title} (Hevy ID: {exercise_id})")
@@ -428,13 +512,14 @@ async def process_exercise_async(
         }
         
         async with session.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=10)
+            _PAGES_URL,
+            data=orjson.dumps(payload)
         ) as response:
             if response.status == 200:
-                return await response.json()
+                result = orjson.loads(await response.read())
+                if exercise_id and result.get("id"):
+                    _exercise_page_cache[exercise_id] = (result["id"], content_hash)
+                return result
             else:
                 text = await response.text()
                 logging.error(f"Failed to create exercise: {response.status} - {text}")
@@ -457,49 +542,68 @@ async def process_exercises_async(
     Returns:
         List of successfully processed exercise info dictionaries
     """
-    notion_api_key = os.environ.get("NOTION_API_KEY")
-    notion_exercises_db_id = os.environ.get("NOTION_EXERCISES_DATABASE_ID")
+    notion_exercises_db_id = _NOTION_EXERCISES_DB_ID
     
-    if not notion_api_key or not notion_exercises_db_id:
+    if not _NOTION_API_KEY or not notion_exercises_db_id:
         logging.error("NOTION_API_KEY or NOTION_EXERCISES_DATABASE_ID not configured")
         return []
     
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for template in exercise_templates:
-            task = process_exercise_async(
-                template,
-                session,
-                notion_api_key,
-                notion_exercises_db_id
-            )
-            tasks.append(task)
-        
-        # Process all exercises in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build processed exercises list
-        processed = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logging.error(f"Exception processing exercise: {str(result)}")
-            elif result is not None and isinstance(result, dict):
-                template_data = exercise_templates[i].get("exercise_template", exercise_templates[i])
-                processed.append({
-                    "exercise_template_id": template_data.get("id", ""),
-                    "title": template_data.get("title", "Unknown"),
-                    "notion_page_id": result.get("id")
-                })
-        
-        return processed
+    session = await _get_session()
+    
+    # Look up all existing exercises with one query instead of one per exercise.
+    # Exercises with a cached page are skipped, their page ID is already known.
+    # The cache is read once here and the entries are passed on, so an entry
+    # expiring before its exercise is processed cannot lead to a duplicate page.
+    exercise_ids = [
+        template.get("exercise_template", template).get("id", "")
+        for template in exercise_templates
+    ]
+    cached_pages = {}
+    for exercise_id in exercise_ids:
+        cached = _exercise_page_cache.get(exercise_id)
+        if cached:
+            cached_pages[exercise_id] = cached
+    existing_pages = await _query_exercise_pages_async(
+        session,
+        notion_exercises_db_id,
+        [exercise_id for exercise_id in exercise_ids if exercise_id not in cached_pages]
+    )
+    
+    tasks = []
+    for template, exercise_id in zip(exercise_templates, exercise_ids):
+        task = _bounded(process_exercise_async(
+            template,
+            session,
+            notion_exercises_db_id,
+            existing_pages,
+            cached_pages.get(exercise_id)
+        ))
+        tasks.append(task)
+    
+    # Process all exercises in parallel
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Build processed exercises list
+    processed = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            logging.error(f"Exception processing exercise: {str(result)}")
+        elif result is not None and isinstance(result, dict):
+            template_data = exercise_templates[i].get("exercise_template", exercise_templates[i])
+            processed.append({
+                "exercise_template_id": template_data.get("id", ""),
+                "title": template_data.get("title", "Unknown"),
+                "notion_page_id": result.get("id")
+            })
+    
+    return processed
 
 
 async def process_exercise_performance_async(
-    performance_data: Dict[str, Any],
+    performance_data: ExercisePerf,
     workout_page_url: str,
     exercise_notion_pages: Dict[str, str],
     session: aiohttp.ClientSession,
-    notion_api_key: str,
     notion_performances_db_id: str
 ) -> Optional[Dict[str, Any]]:
     """
@@ -512,24 +616,17 @@ async def process_exercise_performance_async(
         performance_data: Aggregated performance data with exercise_template_id, title, total_weight_kg, total_reps
         workout_page_url: Notion page URL of the workout
         exercise_notion_pages: Dictionary mapping exercise_template_id to Notion page URLs
-        session: aiohttp ClientSession
-        notion_api_key: Notion API key
+        session: Shared Notion aiohttp ClientSession
         notion_performances_db_id: Notion Exercise Performances database ID
         
     Returns:
         Response from Notion API with performance page info, or None if error
     """
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    exercise_template_id = performance_data.get("exercise_template_id", "")
-    title = performance_data.get("title", "Unknown Exercise")
-    total_weight_kg = performance_data.get("total_weight_kg", 0.0)
-    total_reps = performance_data.get("total_reps", 0)
-    set_count = performance_data.get("set_count", 0)
+    exercise_template_id = performance_data.exercise_template_id
+    title = performance_data.title
+    total_weight_kg = performance_data.total_weight_kg
+    total_reps = performance_data.total_reps
+    set_count = performance_data.set_count
     
     # Get exercise page URL from the mapping
     exercise_page_url = exercise_notion_pages.get(exercise_template_id)
@@ -582,13 +679,11 @@ async def process_exercise_performance_async(
         }
         
         async with session.post(
-            f"https://api.notion.com/v1/databases/{notion_performances_db_id}/query",
-            headers=headers,
-            json=search_payload,
-            timeout=aiohttp.ClientTimeout(total=10)
+            _query_url(notion_performances_db_id),
+            data=orjson.dumps(search_payload)
         ) as search_response:
             if search_response.status == 200:
-                data = await search_response.json()
+                data = orjson.loads(await search_response.read())
                 results = data.get("results", [])
                 
                 if results:
@@ -597,13 +692,11 @@ async def process_exercise_performance_async(
                     logging.info(f"Updating existing exercise performance: {title} ({set_count} sets, {total_reps} reps, {total_weight_kg:.2f} kg)")
                     
                     async with session.patch(
-                        f"https://api.notion.com/v1/pages/{page_id}",
-                        headers=headers,
-                        json={"properties": properties},
-                        timeout=aiohttp.ClientTimeout(total=10)
+                        _PAGES_URL / page_id,
+                        data=orjson.dumps({"properties": properties})
                     ) as update_response:
                         if update_response.status == 200:
-                            return await update_response.json()
+                            return orjson.loads(await update_response.read())
                         else:
                             text = await update_response.text()
                             logging.error(f"Failed to update exercise performance: {update_response.status} - {text}")
@@ -618,13 +711,11 @@ async def process_exercise_performance_async(
         }
         
         async with session.post(
-            "https://api.notion.com/v1/pages",
-            headers=headers,
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=10)
+            _PAGES_URL,
+            data=orjson.dumps(payload)
         ) as response:
             if response.status == 200:
-                return await response.json()
+                return orjson.loads(await response.read())
             else:
                 text = await response.text()
                 logging.error(f"Failed to create exercise performance: {response.status} - {text}")
@@ -636,7 +727,7 @@ async def process_exercise_performance_async(
 
 
 async def process_exercise_performances_async(
-    performance_data_list: List[Dict[str, Any]],
+    performance_data_list: List[ExercisePerf],
     workout_page_id: str,
     exercise_notion_pages: Dict[str, str]
 ) -> List[Dict[str, Any]]:
@@ -654,10 +745,9 @@ async def process_exercise_performances_async(
     Returns:
         List of successfully processed exercise performance info dictionaries
     """
-    notion_api_key = os.environ.get("NOTION_API_KEY")
-    notion_performances_db_id = os.environ.get("NOTION_EXERCISE_PERFORMANCES_DATABASE_ID")
+    notion_performances_db_id = _NOTION_PERFORMANCES_DB_ID
     
-    if not notion_api_key or not notion_performances_db_id:
+    if not _NOTION_API_KEY or not notion_performances_db_id:
         logging.error("NOTION_API_KEY or NOTION_EXERCISE_PERFORMANCES_DATABASE_ID not configured")
         return []
     
@@ -665,36 +755,36 @@ async def process_exercise_performances_async(
     workout_page_url = workout_page_id.replace("-", "")
     exercise_pages_dict = {k: v.replace("-", "") for k, v in exercise_notion_pages.items()}
     
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for perf_data in performance_data_list:
-            task = process_exercise_performance_async(
-                perf_data,
-                workout_page_url,
-                exercise_pages_dict,
-                session,
-                notion_api_key,
-                notion_performances_db_id
-            )
-            tasks.append(task)
-        
-        # Process all performances in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build processed performances list
-        processed = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logging.error(f"Exception processing exercise performance: {str(result)}")
-            elif result is not None and isinstance(result, dict):
-                perf_data = performance_data_list[i]
-                processed.append({
-                    "exercise_template_id": perf_data.get("exercise_template_id", ""),
-                    "title": perf_data.get("title", "Unknown"),
-                    "set_count": perf_data.get("set_count", 0),
-                    "total_weight_kg": perf_data.get("total_weight_kg", 0.0),
-                    "total_reps": perf_data.get("total_reps", 0),
-                    "notion_page_id": result.get("id")
-                })
-        
-        return processed
+    session = await _get_session()
+    
+    tasks = []
+    for perf_data in performance_data_list:
+        task = _bounded(process_exercise_performance_async(
+            perf_data,
+            workout_page_url,
+            exercise_pages_dict,
+            session,
+            notion_performances_db_id
+        ))
+        tasks.append(task)
+    
+    # Process all performances in parallel
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Build processed performances list
+    processed = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            logging.error(f"Exception processing exercise performance: {str(result)}")
+        elif result is not None and isinstance(result, dict):
+            perf_data = performance_data_list[i]
+            processed.append({
+                "exercise_template_id": perf_data.exercise_template_id,
+                "title": perf_data.title,
+                "set_count": perf_data.set_count,
+                "total_weight_kg": perf_data.total_weight_kg,
+                "total_reps": perf_data.total_reps,
+                "notion_page_id": result.get("id")
+            })
+    
+    return processed
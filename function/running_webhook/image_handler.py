@@ -2,18 +2,53 @@
 
 import logging
 import os
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 
+# Shared client, created once per worker process so the AAD token and the HTTP
+# connections to the storage account are not set up per request
+_blob_service_client = None
 
-def upload_image_to_blob_storage(image_data, filename):
+# Images above this size are uploaded as blocks of the same size, several in
+# parallel. Smaller images are sent with a single PUT.
+_MAX_SINGLE_PUT_SIZE = 4 * 1024 * 1024
+_UPLOAD_CONCURRENCY = 4
+
+
+def get_blob_service_client(blob_endpoint):
+    """
+    Return the shared BlobServiceClient, creating it on first use.
+    
+    Args:
+        blob_endpoint: Blob endpoint URL of the storage account
+    
+    Returns:
+        Shared async BlobServiceClient
+    """
+    global _blob_service_client
+    
+    if _blob_service_client is None:
+        # Imported on first use, the Azure SDKs are slow to import and only
+        # needed once a request has passed validation
+        from azure.identity.aio import DefaultAzureCredential
+        from azure.storage.blob.aio import BlobServiceClient
+        
+        _blob_service_client = BlobServiceClient(
+            account_url=blob_endpoint,
+            credential=DefaultAzureCredential(),
+            max_single_put_size=_MAX_SINGLE_PUT_SIZE,
+            max_block_size=_MAX_SINGLE_PUT_SIZE
+        )
+    
+    return _blob_service_client
+
+
+async def upload_image_to_blob_storage(image_data, filename):
     """
     Upload image to Azure Blob Storage.
     
     Args:
         image_data: Binary image data
         filename: Name for the blob file
-        
+    
     Returns:
         Blob URL if successful, None if failed
     """
@@ -25,27 +60,25 @@ def upload_image_to_blob_storage(image_data, filename):
         
         container_name = "uploaded-images"
         
-        # Initialize BlobServiceClient with DefaultAzureCredential
-        credential = DefaultAzureCredential()
-        blob_service_client = BlobServiceClient(
-            account_url=blob_endpoint,
-            credential=credential
-        )
-        
         # Get blob client
-        blob_client = blob_service_client.get_blob_client(
+        blob_client = get_blob_service_client(blob_endpoint).get_blob_client(
             container=container_name,
             blob=filename
         )
         
         # Upload the image
-        blob_client.upload_blob(image_data, overwrite=True)
+        await blob_client.upload_blob(
+            image_data,
+            overwrite=True,
+            length=len(image_data),
+            max_concurrency=_UPLOAD_CONCURRENCY
+        )
         
         # Return the blob URL
         blob_url = blob_client.url
         logging.info(f"Successfully uploaded image to blob storage: {blob_url}")
         return blob_url
-        
+    
     except Exception as e:
         logging.error(f"Failed to upload image to blob storage: {str(e)}", exc_info=True)
         return None
@@ -2,86 +2,70 @@
 
 import logging
 import os
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+# Pooled session, keeps the TLS connection to api.notion.com alive between
+# warm invocations
+_session = requests.Session()
+_session.headers.update({
+    "Content-Type": "application/json",
+    "Notion-Version": "2022-06-28"
+})
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Connect and read timeouts for Notion requests in seconds
+_TIMEOUT = (3, 10)
+
+
+# Knee pain level to Notion select option
+_PAIN_MAPPING = {
+    0: "None 🥳",
+    1: "🔥",
+    2: "🔥🔥",
+    3: "🔥🔥🔥",
+    4: "🔥🔥🔥🔥",
+    5: "🔥🔥🔥🔥🔥"
+}
+
+# Prebuilt "Knee Pain" property per option, only ever serialized
+_KNEE_PAIN_PROPERTIES = {
+    option: {"select": {"name": option}}
+    for option in _PAIN_MAPPING.values()
+}
 
 
 def map_knee_pain_to_notion(knee_pain_value):
-    """Map knee pain numeric value to Notion select option."""
-    if not knee_pain_value:
-        return None
-    
-    try:
-        pain_level = int(knee_pain_value)
-        pain_mapping = {
-            0: "None 🥳",
-            1: "🔥",
-            2: "🔥🔥",
-            3: "🔥🔥🔥",
-            4: "🔥🔥🔥🔥",
-            5: "🔥🔥🔥🔥🔥"
-        }
-        return pain_mapping.get(pain_level)
-    except (ValueError, TypeError):
-        logging.warning(f"Invalid knee pain value: {knee_pain_value}")
-        return None
+    """Map validated knee pain level (0-5 or None) to Notion select option."""
+    return _PAIN_MAPPING.get(knee_pain_value)
 
 
 def add_to_notion_database(workout_data, knee_pain, comment, blob_url=None):
-    """Add workout entry to Notion database."""
+    """Add workout entry to Notion database. knee_pain is an int level or None."""
     notion_api_key = os.environ.get("NOTION_API_KEY")
     notion_database_id = os.environ.get("NOTION_DATABASE_ID")
     
     if not notion_api_key or not notion_database_id:
         raise ValueError("NOTION_API_KEY and NOTION_DATABASE_ID environment variables must be set")
     
-    # Prepare Notion API headers
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     # Build properties according to field mapping
     properties = {
-        "Time (min)": {
-            "number": workout_data.get("duration")
-        },
-        "Distance": {
-            "number": workout_data.get("distance")
-        },
-        "Avg. Cadence (SPM)": {
-            "number": workout_data.get("cadence")
-        },
-        "Avg. BPM": {
-            "number": workout_data.get("bpm")
-        },
-        "Date": {
-            "date": {
-                "start": workout_data.get("date")
-            }
-        }
+        "Time (min)": {"number": workout_data.get("duration")},
+        "Distance": {"number": workout_data.get("distance")},
+        "Avg. Cadence (SPM)": {"number": workout_data.get("cadence")},
+        "Avg. BPM": {"number": workout_data.get("bpm")},
+        "Date": {"date": {"start": workout_data.get("date")}}
     }
     
     # Add knee pain if provided
     knee_pain_option = map_knee_pain_to_notion(knee_pain)
     if knee_pain_option:
-        properties["Knee Pain"] = {
-            "select": {
-                "name": knee_pain_option
-            }
-        }
+        properties["Knee Pain"] = _KNEE_PAIN_PROPERTIES[knee_pain_option]
     
     # Add comment if provided
     if comment:
-        properties["Comment"] = {
-            "rich_text": [
-                {
-                    "text": {
-                        "content": comment
-                    }
-                }
-            ]
-        }
+        properties["Comment"] = {"rich_text": [{"text": {"content": comment}}]}
     
     # Add blob URL if provided
     if blob_url:
@@ -98,14 +82,15 @@ def add_to_notion_database(workout_data, knee_pain, comment, blob_url=None):
     }
     
     # Make the API request to create a page in the database
-    response = requests.post(
+    response = _session.post(
         "https://api.notion.com/v1/pages",
-        headers=headers,
-        json=payload
+        headers={"Authorization": f"Bearer {notion_api_key}"},
+        data=orjson.dumps(payload),
+        timeout=_TIMEOUT
     )
     
     if response.status_code != 200:
         logging.error(f"Notion API error: {response.status_code} - {response.text}")
         response.raise_for_status()
     
-    return response.json()
+    return orjson.loads(response.content)
@@ -1,80 +1,107 @@
 """Azure OpenAI integration for image analysis."""
 
 import logging
+import json
 import os
-import base64
-from azure.identity import DefaultAzureCredential
-from openai import AzureOpenAI
+import pybase64
 
 # Image analysis prompt
 IMAGE_ANALYSIS_PROMPT = """Analyze the provided image of an iOS running workout.
-Extract the following information and output it in json format (example can be found at the end).
+Respond with a JSON object with these keys:
 
-Required information:
-- Workout time in minutes
-- Distance in km (2 decimals)
-- Avg. Cadence (only number)
-- Avg heart rate (only number)
-- Date
+- "duration": workout time in minutes
+- "distance": distance in km (2 decimals)
+- "cadence": avg. cadence (only number)
+- "bpm": avg. heart rate (only number)
+- "date": date as YYYY-MM-DD"""
 
-json should look like this:
 
-{
-    "duration": 62.5,
-    "distance": 4.82,
-    "cadence": 175,
-    "bpm": 145,
-    "date": "2024-06-15"
-}"""
+# Used to detect when the streamed response holds a complete JSON object
+_JSON_DECODER = json.JSONDecoder()
+
+# Shared client, created once per worker process so the AAD token and the HTTP
+# connections to Azure OpenAI are not set up per request
+_client = None
 
 
 def get_openai_client():
     """
-    Initialize and return Azure OpenAI client with automatic token refresh.
+    Return the shared async Azure OpenAI client, creating it on first use.
     
-    The SDK handles token refresh automatically using azure_ad_token_provider.
+    The SDK handles token refresh automatically using azure_ad_token_provider,
+    the credential caches tokens until shortly before they expire.
     """
+    global _client
+    
+    if _client is not None:
+        return _client
+    
     endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT")
     if not endpoint:
         raise ValueError("AZURE_OPENAI_ENDPOINT environment variable is not set")
     
-    # Pass credential directly - SDK will handle token refresh automatically
+    # Imported on first use, the Azure and OpenAI SDKs are slow to import and
+    # only needed once a request has passed validation
+    from azure.identity.aio import DefaultAzureCredential
+    from openai import AsyncAzureOpenAI
+    
     credential = DefaultAzureCredential()
     
-    return AzureOpenAI(
+    async def get_token():
+        token = await credential.get_token("https://cognitiveservices.azure.com/.default")
+        return token.token
+    
+    _client = AsyncAzureOpenAI(
         azure_endpoint=endpoint,
         api_version="2024-02-15-preview",
-        azure_ad_token_provider=lambda: credential.get_token(
-            "https://cognitiveservices.azure.com/.default"
-        ).token
+        azure_ad_token_provider=get_token,
+        # The SDK retries 429 and 5xx responses with exponential backoff and
+        # honors Retry-After
+        max_retries=3
     )
+    
+    return _client
 
 
-def analyze_workout_image(image_data):
+def _extract_json_object(text):
     """
-    Analyze workout image using Azure OpenAI.
+    Return the first complete JSON object in text.
     
     Args:
-        image_data: Binary image data
+        text: Model output received so far
         
     Returns:
-        dict: Parsed workout data from the image
-        
-    Raises:
-        Exception: If analysis fails or response is invalid
+        str: The JSON object, or None if it is not complete yet
     """
-    # Get Azure OpenAI client and deployment name
-    client = get_openai_client()
-    deployment_name = os.environ.get("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini")
+    start = text.find("{")
+    if start == -1:
+        return None
     
-    # Encode image to base64
-    base64_image = base64.b64encode(image_data).decode('utf-8')
+    try:
+        _, end = _JSON_DECODER.raw_decode(text, start)
+    except ValueError:
+        return None
     
-    # Call Azure OpenAI to analyze the image
-    logging.info(f"Sending image to Azure OpenAI (deployment: {deployment_name})")
+    return text[start:end]
+
+
+async def _create_completion(client, deployment_name, image_url):
+    """
+    Start a streamed chat completion that analyzes the workout image.
     
-    response = client.chat.completions.create(
+    Args:
+        client: Async Azure OpenAI client
+        deployment_name: Name of the model deployment
+        image_url: Image as base64 data URL
+        
+    Returns:
+        Stream of chat completion chunks
+    """
+    return await client.chat.completions.create(
         model=deployment_name,
+        stream=True,
+        # JSON mode, the model only emits a valid JSON object
+        response_format={"type": "json_object"},
         messages=[
             {
                 "role": "user",
@@ -86,16 +113,78 @@ def analyze_workout_image(image_data):
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
+                            "url": image_url
                         }
                     }
                 ]
             }
         ]
     )
+
+
+async def analyze_workout_image(image_data):
+    """
+    Analyze workout image using Azure OpenAI.
+    
+    Args:
+        image_data: Binary image data
+        
+    Returns:
+        dict: Parsed workout data from the image
+        
+    Raises:
+        Exception: If analysis fails or response is invalid
+    """
+    from openai import RateLimitError
+    
+    # Get Azure OpenAI client and deployment name
+    client = get_openai_client()
+    deployment_name = os.environ.get("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini")
+    
+    # Build the data URL in one buffer, the encoded image is ASCII
+    image_url = (b"data:image/jpeg;base64," + pybase64.b64encode(image_data)).decode('ascii')
+    
+    # Call Azure OpenAI to analyze the image
+    logging.info(f"Sending image to Azure OpenAI (deployment: {deployment_name})")
+    
+    try:
+        stream = await _create_completion(client, deployment_name, image_url)
+    except RateLimitError:
+        # Still throttled after the SDK retries, try the overflow deployment
+        fallback_deployment_name = os.environ.get("AZURE_OPENAI_FALLBACK_DEPLOYMENT_NAME")
+        if not fallback_deployment_name:
+            logging.warning(
+                "Azure OpenAI deployment %s is still throttled after retries "
+                "and no fallback deployment is configured",
+                deployment_name
+            )
+            raise
+        logging.warning(
+            "Azure OpenAI deployment %s is still throttled after retries, retrying with %s",
+            deployment_name, fallback_deployment_name
+        )
+        stream = await _create_completion(client, fallback_deployment_name, image_url)
+    
+    # Collect the streamed response and stop as soon as it holds a complete
+    # JSON object, anything the model appends after it is not needed
+    ai_response = ""
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            ai_response += delta
+            
+            if "}" in delta:
+                workout_json = _extract_json_object(ai_response)
+                if workout_json is not None:
+                    ai_response = workout_json
+                    break
+    finally:
+        await stream.close()
     
-    # Extract the response content
-    ai_response = response.choices[0].message.content
-    logging.info(f"Raw Azure OpenAI response: {ai_response}")
+    logging.debug("Raw Azure OpenAI response: %s", ai_response)
     
     return ai_response
@@ -1,9 +1,10 @@
 """Main webhook handler for processing running workout data."""
 
 import azure.functions as func
+import asyncio
 import logging
 import os
-import json
+import orjson
 import uuid
 from datetime import datetime
 
@@ -18,7 +19,7 @@ from .openai_handler import analyze_workout_image
 from .notion_handler import add_to_notion_database
 
 
-def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
+async def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
     """
     Webhook endpoint to receive workout data from iOS Shortcuts.
     Accepts multipart/form-data with:
@@ -29,45 +30,49 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Workout webhook received.')
     
     try:
-        # Validate request size
+        # Reject invalid requests from the headers alone, before req.form or
+        # req.files parse the multipart body
         content_length = req.headers.get('Content-Length')
-        if content_length:
-            content_length_int = int(content_length)
-            if content_length_int > MAX_REQUEST_SIZE:
-                logging.warning(f"Request too large: {content_length_int} bytes")
-                return func.HttpResponse(
-                    f"Request too large. Maximum size is {MAX_REQUEST_SIZE / (1024*1024):.0f}MB",
-                    status_code=413
-                )
+        if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+            logging.warning("Request too large: %s bytes", content_length)
+            return func.HttpResponse(
+                f"Request too large. Maximum size is {MAX_REQUEST_SIZE / (1024*1024):.0f}MB",
+                status_code=413
+            )
+        
+        content_type = req.headers.get('Content-Type') or ''
+        if not content_type.lower().startswith('multipart/form-data'):
+            logging.warning("Unsupported Content-Type: %s", content_type)
+            return func.HttpResponse(
+                "Content-Type must be multipart/form-data",
+                status_code=415
+            )
         
-        # Log request details
-        logging.info(f"Content-Type: {req.headers.get('Content-Type')}")
-        logging.info(f"Content-Length: {req.headers.get('Content-Length')}")
+        logging.debug("Content-Type: %s, Content-Length: %s", content_type, content_length)
         
         # Extract form fields
-        knee_pain = sanitize_text_input(req.form.get('knee_pain'), 'knee_pain', max_length=10)
+        # knee_pain is parsed as a number, so it needs no text sanitization
+        knee_pain_raw = (req.form.get('knee_pain') or '').strip()
         comment = sanitize_text_input(req.form.get('comment'), 'comment', max_length=500)
         
-        # Validate knee_pain is numeric if provided
-        if knee_pain:
-            try:
-                pain_value = int(knee_pain)
-                if pain_value < 0 or pain_value > 5:
-                    logging.warning(f"Invalid knee pain value: {pain_value}")
-                    return func.HttpResponse(
-                        "Knee pain must be between 0 and 5",
-                        status_code=400
-                    )
-            except ValueError:
-                logging.warning(f"Knee pain is not a valid number: {knee_pain}")
+        # Validate knee_pain is numeric if provided. The length cap keeps
+        # arbitrarily long digit strings away from int().
+        knee_pain = None
+        if knee_pain_raw:
+            digits = knee_pain_raw[1:] if knee_pain_raw[0] in '+-' else knee_pain_raw
+            if not (len(digits) <= 10 and digits.isascii() and digits.isdigit()):
+                logging.warning("Knee pain is not a valid number: %s", knee_pain_raw[:10])
                 return func.HttpResponse(
                     "Knee pain must be a number",
                     status_code=400
                 )
-        
-        # Log form data
-        logging.info(f"Knee Pain: {knee_pain}")
-        logging.info(f"Comment: {comment}")
+            knee_pain = int(knee_pain_raw)
+            if not 0 <= knee_pain <= 5:
+                logging.warning("Invalid knee pain value: %s", knee_pain_raw)
+                return func.HttpResponse(
+                    "Knee pain must be between 0 and 5",
+                    status_code=400
+                )
         
         # Extract file upload
         screenshot = req.files.get('screenshot')
@@ -79,27 +84,25 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
                 status_code=400
             )
         
+        # Read the image once, all validation works on this buffer
+        image_data = screenshot.stream.read()
+        
         # Validate file size
-        is_valid, error_msg = validate_file_upload(screenshot, req)
+        is_valid, error_msg = validate_file_upload(len(image_data), req)
         if not is_valid:
-            logging.warning(f"File validation failed: {error_msg}")
+            logging.warning("File validation failed: %s", error_msg)
             return func.HttpResponse(error_msg, status_code=400)
         
         # Validate file type (magic bytes)
-        is_valid, error_msg, img_type = validate_image_file(screenshot, screenshot.filename)
+        is_valid, error_msg, img_type = validate_image_file(image_data[:12], screenshot.filename)
         if not is_valid:
-            logging.warning(f"Image validation failed: {error_msg}")
+            logging.warning("Image validation failed: %s", error_msg)
             return func.HttpResponse(error_msg, status_code=400)
         
-        logging.info(f"Image type validated: {img_type}")
-        
-        # Log file information
-        logging.info(f"Screenshot filename: {screenshot.filename}")
-        logging.info(f"Screenshot content type: {screenshot.content_type}")
-        
-        # Read image data
-        image_data = screenshot.stream.read()
-        logging.info(f"Screenshot size: {len(image_data)} bytes")
+        logging.info(
+            "Screenshot validated: %s (%s, %s bytes)",
+            screenshot.filename, img_type, len(image_data)
+        )
         
         # Generate filename with timestamp and UUID
         timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
@@ -107,16 +110,24 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
         file_extension = os.path.splitext(screenshot.filename)[1] or '.jpg'
         blob_filename = f"{timestamp}_{unique_id}{file_extension}"
         
-        # Upload image to blob storage
-        blob_url = upload_image_to_blob_storage(image_data, blob_filename)
+        # Upload image to blob storage and analyze it with Azure OpenAI concurrently,
+        # the blob URL is only needed for the Notion entry
+        blob_result, ai_result = await asyncio.gather(
+            upload_image_to_blob_storage(image_data, blob_filename),
+            analyze_workout_image(image_data),
+            return_exceptions=True
+        )
+        
+        blob_url = None if isinstance(blob_result, BaseException) else blob_result
         if blob_url:
-            logging.info(f"Image uploaded to blob storage: {blob_url}")
+            logging.info("Image uploaded to blob storage: %s", blob_url)
         else:
             logging.warning("Failed to upload image to blob storage, continuing without blob URL")
         
-        # Analyze image with Azure OpenAI
         try:
-            ai_response = analyze_workout_image(image_data)
+            if isinstance(ai_result, BaseException):
+                raise ai_result
+            ai_response = ai_result
             
             if not ai_response:
                 logging.error("No response from Azure OpenAI")
@@ -127,41 +138,34 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
             
             # Parse and validate the JSON response
             try:
-                workout_data = json.loads(ai_response)
+                workout_data = orjson.loads(ai_response)
                 
                 # Validate required fields
                 required_fields = ["duration", "distance", "cadence", "bpm", "date"]
                 missing_fields = [field for field in required_fields if field not in workout_data]
                 
                 if missing_fields:
-                    logging.warning(f"Missing fields in AI response: {missing_fields}")
+                    logging.warning("Missing fields in AI response: %s", missing_fields)
                     return func.HttpResponse(
                         f"AI response missing required fields: {missing_fields}",
                         status_code=500
                     )
                 
-                # Log parsed workout data
-                logging.info("=== Parsed Workout Data ===")
-                logging.info(f"Duration: {workout_data['duration']} minutes")
-                logging.info(f"Distance: {workout_data['distance']} km")
-                logging.info(f"Cadence: {workout_data['cadence']}")
-                logging.info(f"Heart Rate: {workout_data['bpm']} bpm")
-                logging.info(f"Date: {workout_data['date']}")
-                
-                # Also log additional form data if present
-                if knee_pain:
-                    logging.info(f"Knee Pain: {knee_pain}")
-                if comment:
-                    logging.info(f"Comment: {comment}")
-                
-                logging.info("=========================")
+                logging.info(
+                    "Parsed workout data: duration=%s min, distance=%s km, cadence=%s, bpm=%s, date=%s, knee_pain=%s",
+                    workout_data['duration'], workout_data['distance'], workout_data['cadence'],
+                    workout_data['bpm'], workout_data['date'], knee_pain
+                )
+                logging.debug("Comment: %s", comment)
                 
                 # Add to Notion database
                 try:
                     logging.info("Adding workout entry to Notion database...")
-                    notion_response = add_to_notion_database(workout_data, knee_pain, comment, blob_url)
+                    notion_response = await asyncio.to_thread(
+                        add_to_notion_database, workout_data, knee_pain, comment, blob_url
+                    )
                     notion_page_id = notion_response.get("id")
-                    logging.info(f"Successfully created Notion page: {notion_page_id}")
+                    logging.info("Successfully created Notion page: %s", notion_page_id)
                     
                     # Prepare response data
                     response_data = {
@@ -172,7 +176,7 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
                     }
                     
                     # Include additional fields in response
-                    if knee_pain:
+                    if knee_pain is not None:
                         response_data["data"]["knee_pain"] = knee_pain
                     if comment:
                         response_data["data"]["comment"] = comment
@@ -180,41 +184,41 @@ def workout_webhook(req: func.HttpRequest) -> func.HttpResponse:
                         response_data["data"]["image_blob_url"] = blob_url
                     
                     return func.HttpResponse(
-                        json.dumps(response_data, indent=2),
+                        orjson.dumps(response_data, option=orjson.OPT_INDENT_2),
                         status_code=200,
                         mimetype="application/json"
                     )
                     
                 except Exception as e:
-                    logging.error(f"Error adding to Notion: {str(e)}", exc_info=True)
+                    logging.error("Error adding to Notion: %s", e, exc_info=True)
                     return func.HttpResponse(
-                        json.dumps({
+                        orjson.dumps({
                             "status": "partial_success",
                             "message": "Workout data processed but failed to add to Notion",
                             "data": workout_data,
                             "error": str(e)
-                        }, indent=2),
+                        }, option=orjson.OPT_INDENT_2),
                         status_code=500,
                         mimetype="application/json"
                     )
                 
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse AI response as JSON: {str(e)}")
-                logging.error(f"AI response was: {ai_response}")
+            except orjson.JSONDecodeError as e:
+                logging.error("Failed to parse AI response as JSON: %s", e)
+                logging.debug("AI response was: %s", ai_response)
                 return func.HttpResponse(
                     f"Failed to parse AI response as JSON: {str(e)}",
                     status_code=500
                 )
         
         except Exception as e:
-            logging.error(f"Error calling Azure OpenAI: {str(e)}", exc_info=True)
+            logging.error("Error calling Azure OpenAI: %s", e, exc_info=True)
             return func.HttpResponse(
                 f"Error analyzing image: {str(e)}",
                 status_code=500
             )
     
     except Exception as e:
-        logging.error(f"Error processing webhook: {str(e)}", exc_info=True)
+        logging.error("Error processing webhook: %s", e, exc_info=True)
         return func.HttpResponse(
             f"Error processing webhook: {str(e)}",
             status_code=500
@@ -4,6 +4,7 @@ from .validators import (
     validate_file_upload,
     validate_image_file,
     sanitize_text_input,
+    sanitize_id,
     MAX_FILE_SIZE,
     MAX_REQUEST_SIZE
 )
@@ -12,6 +13,7 @@ __all__ = [
     'validate_file_upload',
     'validate_image_file',
     'sanitize_text_input',
+    'sanitize_id',
     'MAX_FILE_SIZE',
     'MAX_REQUEST_SIZE'
 ]
@@ -2,7 +2,7 @@
 
 import logging
 import os
-import imghdr
+import re
 
 # Define maximum file size (10MB for screenshots)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
@@ -10,13 +10,25 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
 # Define maximum request size (10MB)
 MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB in bytes
 
+# Allowed format for external IDs (UUIDs and similar short identifiers)
+_ID_RE = re.compile(r'[A-Za-z0-9_-]{1,100}')
 
-def validate_file_upload(file_obj, req):
+# File signatures of the accepted image formats
+_JPEG_MAGIC = b'\xff\xd8\xff'
+_PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+# Deletion table for the C0/C1 control characters that are not whitespace
+_CONTROL_CHARS = dict.fromkeys(
+    c for c in range(0xA0) if not (chr(c).isprintable() or chr(c).isspace())
+)
+
+
+def validate_file_upload(file_size, req):
     """
     Validate uploaded file size.
     
     Args:
-        file_obj: File object from request
+        file_size: Size of the uploaded file in bytes
         req: HTTP request object for header access
         
     Returns:
@@ -24,14 +36,9 @@ def validate_file_upload(file_obj, req):
     """
     # Check content length from headers first
     content_length = req.headers.get('Content-Length')
-    if content_length and int(content_length) > MAX_FILE_SIZE:
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE:
         return False, f"File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024):.0f}MB"
     
-    # Read file with size limit
-    file_obj.stream.seek(0, 2)  # Seek to end
-    file_size = file_obj.stream.tell()
-    file_obj.stream.seek(0)  # Reset to beginning
-    
     if file_size > MAX_FILE_SIZE:
         return False, f"File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024):.0f}MB"
     
@@ -41,12 +48,12 @@ def validate_file_upload(file_obj, req):
     return True, None
 
 
-def validate_image_file(file_obj, filename):
+def validate_image_file(header, filename):
     """
     Validate that uploaded file is actually an image.
     
     Args:
-        file_obj: File object to validate
+        header: First bytes of the file (12 bytes are enough)
         filename: Original filename
         
     Returns:
@@ -59,15 +66,15 @@ def validate_image_file(file_obj, filename):
     if ext not in ALLOWED_EXTENSIONS:
         return False, f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}", None
     
-    # Read first bytes to detect actual file type
-    file_obj.stream.seek(0)
-    header = file_obj.stream.read(512)
-    file_obj.stream.seek(0)
-    
     # Detect image type from magic bytes
-    detected_type = imghdr.what(None, h=header)
-    
-    if detected_type not in ['jpeg', 'png']:
+    if header.startswith(_JPEG_MAGIC):
+        detected_type = 'jpeg'
+    elif header.startswith(_PNG_MAGIC):
+        detected_type = 'png'
+    else:
+        detected_type = None
+    
+    if detected_type is None:
         return False, "File content does not match image format", detected_type
     
     return True, None, detected_type
@@ -96,7 +103,34 @@ def sanitize_text_input(text, field_name, max_length=1000):
         logging.warning(f"{field_name} exceeded max length ({len(text)} > {max_length})")
         text = text[:max_length]
     
-    # Remove null bytes and other control characters
-    text = ''.join(char for char in text if char.isprintable() or char.isspace())
+    # Remove null bytes and other control characters. The translation table
+    # covers the common ones, only text with other non-printable characters
+    # (or line breaks) falls back to the per-character filter.
+    text = text.translate(_CONTROL_CHARS)
+    if not text.isprintable():
+        text = ''.join(char for char in text if char.isprintable() or char.isspace())
     
     return text if text else None
+
+
+def sanitize_id(value, field_name):
+    """
+    Validate an identifier such as a UUID.
+    
+    Faster and stricter than sanitize_text_input for values with a known shape.
+    
+    Args:
+        value: Input identifier to validate
+        field_name: Name of the field (for error messages)
+        
+    Returns:
+        The validated identifier
+        
+    Raises:
+        ValueError: If the identifier contains characters other than letters,
+            digits, '-' and '_', or is longer than 100 characters
+    """
+    if not isinstance(value, str) or not _ID_RE.fullmatch(value):
+        raise ValueError(f"Invalid {field_name}")
+    
+    return value